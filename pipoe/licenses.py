@@ -1,228 +1,696 @@
-LICENSES = {
-    "AAL": "AAL",
-    "AFL-1.2": "AFL-1.2",
-    "AFL-2.0": "AFL-2.0",
-    "AFL-2.1": "AFL-2.1",
-    "AFL-3.0": "AFL-3.0",
-    "AGPL-3.0": "AGPL-3.0",
-    "ANTLR-PD": "ANTLR-PD",
-    "APL-1.0": "APL-1.0",
-    "APL2": "Apache-2.0",
-    "APSL-1.0": "APSL-1.0",
-    "APSL-1.1": "APSL-1.1",
-    "APSL-1.2": "APSL-1.2",
-    "APSL-2.0": "APSL-2.0",
-    "ASL": "Apache-2.0",
-    "Adobe": "Adobe",
-    "Apache": "Apache-2.0",
-    "Apache 2.0": "Apache-2.0",
-    "Apache-2.0 license": "Apache-2.0",
-    "Apache License 2.0": "Apache-2.0",
-    "Apache License, Version 2.0": "Apache-2.0",
-    "Apache Software License, Version 2": "Apache-2.0",
-    "Apache Software License": "Apache-2.0",
-    "Apache-2.0 WITH LLVM-exception": "Apache-2.0-with-LLVM-exception",
-    "Apache-1.0": "Apache-1.0",
-    "Apache-1.1": "Apache-1.1",
-    "Apache-2.0": "Apache-2.0",
-    "Artistic-1.0": "Artistic-1.0",
-    "Artistic-2.0": "Artistic-2.0",
-    "BSD": "BSD",
-    "BSD - See ndg/httpsclient/LICENCE file for details": "BSD",
-    "BSD 3-Clause": "BSD-3-Clause",
-    "BSD 3-Clause License": "BSD-3-Clause",
-    "BSD License": "BSD",
-    "BSD or Apache License, Version 2.0": "BSD",
-    "BSD, Public Domain": "BSD",
-    "BSD-2-Clause": "BSD-2-Clause",
-    "BSD-3-Clause": "BSD-3-Clause",
-    "BSD-4-Clause": "BSD-4-Clause",
-    "BSD-derived (http://www.repoze.org/LICENSE.txt)": "BSD",
-    "BSD-like": "BSD",
-    "BSL-1.0": "BSL-1.0",
-    "BitstreamVera": "BitstreamVera",
-    "CATOSL-1.1": "CATOSL-1.1",
-    "CC-BY-1.0": "CC-BY-1.0",
-    "CC-BY-2.0": "CC-BY-2.0",
-    "CC-BY-2.5": "CC-BY-2.5",
-    "CC-BY-3.0": "CC-BY-3.0",
-    "CC-BY-NC-1.0": "CC-BY-NC-1.0",
-    "CC-BY-NC-2.0": "CC-BY-NC-2.0",
-    "CC-BY-NC-2.5": "CC-BY-NC-2.5",
-    "CC-BY-NC-3.0": "CC-BY-NC-3.0",
-    "CC-BY-NC-ND-1.0": "CC-BY-NC-ND-1.0",
-    "CC-BY-NC-ND-2.0": "CC-BY-NC-ND-2.0",
-    "CC-BY-NC-ND-2.5": "CC-BY-NC-ND-2.5",
-    "CC-BY-NC-ND-3.0": "CC-BY-NC-ND-3.0",
-    "CC-BY-NC-SA-1.0": "CC-BY-NC-SA-1.0",
-    "CC-BY-NC-SA-2.0": "CC-BY-NC-SA-2.0",
-    "CC-BY-NC-SA-2.5": "CC-BY-NC-SA-2.5",
-    "CC-BY-NC-SA-3.0": "CC-BY-NC-SA-3.0",
-    "CC-BY-ND-1.0": "CC-BY-ND-1.0",
-    "CC-BY-ND-2.0": "CC-BY-ND-2.0",
-    "CC-BY-ND-2.5": "CC-BY-ND-2.5",
-    "CC-BY-ND-3.0": "CC-BY-ND-3.0",
-    "CC-BY-SA-1.0": "CC-BY-SA-1.0",
-    "CC-BY-SA-2.0": "CC-BY-SA-2.0",
-    "CC-BY-SA-2.5": "CC-BY-SA-2.5",
-    "CC-BY-SA-3.0": "CC-BY-SA-3.0",
-    "CC0-1.0": "CC0-1.0",
-    "CDDL-1.0": "CDDL-1.0",
-    "CECILL-1.0": "CECILL-1.0",
-    "CECILL-2.0": "CECILL-2.0",
-    "CECILL-B": "CECILL-B",
-    "CECILL-C": "CECILL-C",
-    "CPAL-1.0": "CPAL-1.0",
-    "CPL-1.0": "CPL-1.0",
-    "CUA-OPL-1.0": "CUA-OPL-1.0",
-    "ClArtistic": "ClArtistic",
-    "DSSSL": "DSSSL",
-    "Dual License": "BSD",
-    "ECL-1.0": "ECL-1.0",
-    "ECL-2.0": "ECL-2.0",
-    "EDL-1.0": "EDL-1.0",
-    "EFL-1.0": "EFL-1.0",
-    "EFL-2.0": "EFL-2.0",
-    "EPL-1.0": "EPL-1.0",
-    "EPL-2.0": "EPL-2.0",
-    "EUDatagrid": "EUDatagrid",
-    "EUPL-1.0": "EUPL-1.0",
-    "EUPL-1.1": "EUPL-1.1",
-    "Elfutils-Exception": "Elfutils-Exception",
-    "Entessa": "Entessa",
-    "ErlPL-1.1": "ErlPL-1.1",
-    "Expat license": "MIT",
-    "Expat (MIT/X11)": "MIT",
-    "Fair": "Fair",
-    "Frameworx-1.0": "Frameworx-1.0",
-    "FreeType": "FreeType",
-    "GFDL-1.1": "GFDL-1.1",
-    "GFDL-1.2": "GFDL-1.2",
-    "GFDL-1.3": "GFDL-1.3",
-    "GNU GPLv3+": "GPL-3.0",
-    "GNU General Public License Version 3": "GPL-3.0",
-    "GNU LGPL": "LGPL-2.0",
-    "GPL": "GPL-1.0",
-    "GPL V2 or later": "GPL-2.0",
-    "GPL-1.0": "GPL-1.0",
-    "GPL-2-with-bison-exception": "GPL-2-with-bison-exception",
-    "GPL-2.0": "GPL-2.0",
-    "GPL-2.0-with-GCC-exception": "GPL-2.0-with-GCC-exception",
-    "GPL-2.0-with-autoconf-exception": "GPL-2.0-with-autoconf-exception",
-    "GPL-2.0-with-classpath-exception": "GPL-2.0-with-classpath-exception",
-    "GPL-2.0-with-font-exception": "GPL-2.0-with-font-exception",
-    "GPL-3.0": "GPL-3.0",
-    "GPL-3.0-with-GCC-exception": "GPL-3.0-with-GCC-exception",
-    "GPL-3.0-with-autoconf-exception": "GPL-3.0-with-autoconf-exception",
-    "GPLv3+": "GPLv3",
-    "HPND": "HPND",
-    "IPA": "IPA",
-    "IPL-1.0": "IPL-1.0",
-    "ISC": "ISC",
-    "ISC license": "ISC",
-    "LGPL": "LGPL-2.0",
-    "LGPL-2.0": "LGPL-2.0",
-    "LGPL-2.1": "LGPL-2.1",
-    "LGPL-3.0": "LGPL-3.0",
-    "LGPLv2": "LGPL-2.0",
-    "LGPLv2+": "LGPL-2.0",
-    "LGPLv3": "LGPL-3.0",
-    "LPGL, see LICENSE file.": "LGPL-1.0",
-    "LPL-1.02": "LPL-1.02",
-    "LPPL-1.0": "LPPL-1.0",
-    "LPPL-1.1": "LPPL-1.1",
-    "LPPL-1.2": "LPPL-1.2",
-    "LPPL-1.3c": "LPPL-1.3c",
-    "Libpng": "Libpng",
-    "License :: OSI Approved :: Apache Software License": "Apache-2.0",
-    "License :: OSI Approved :: MIT License (http://opensource.org/licenses/MIT)": "MIT",
-    "License :: OSI Approved :: BSD License": "BSD",
-    "License :: OSI Approved :: MIT License": "MIT",
-    "License :: OSI Approved :: Python Software Foundation License": "Python-2.0",
-    "MIT": "MIT",
-    "MIT License": "MIT",
-    "MIT license": "MIT",
-    "MIT/X11": "MIT",
-    "MIT-CMU": "MIT-CMU",
-    "MPL v2": "MPL-2.0",
-    "MPL-1.0": "MPL-1.0",
-    "MPL-1.1": "MPL-1.1",
-    "MPL-2.0": "MPL-2.0",
-    "MPLv2.0, MIT Licences": "MIT",
-    "MS-PL": "MS-PL",
-    "MS-RL": "MS-RL",
-    "MirOS": "MirOS",
-    "Modified BSD License": "BSD",
-    "Motosoto": "Motosoto",
-    "Multics": "Multics",
-    "NASA-1.3": "NASA-1.3",
-    "NCSA": "NCSA",
-    "NGPL": "NGPL",
-    "NPOSL-3.0": "NPOSL-3.0",
-    "NTP": "NTP",
-    "Nauman": "Nauman",
-    "New BSD": "BSD",
-    "Nokia": "Nokia",
-    "OASIS": "OASIS",
-    "OCLC-2.0": "OCLC-2.0",
-    "ODbL-1.0": "ODbL-1.0",
-    "OFL-1.1": "OFL-1.1",
-    "OGTSL": "OGTSL",
-    "OLDAP-2.8": "OLDAP-2.8",
-    "OSL-1.0": "OSL-1.0",
-    "OSL-2.0": "OSL-2.0",
-    "OSL-3.0": "OSL-3.0",
-    "OpenSSL": "OpenSSL",
-    "PD": "PD",
-    "PHP-3.0": "PHP-3.0",
-    "PSF": "Python-2.0",
-    "PSF License": "Python-2.0",
-    "PSF license": "Python-2.0",
-    "PSFL": "Python-2.0",
-    "PostgreSQL": "PostgreSQL",
-    "Proprietary": "Proprietary",
-    "Public Domain": "PD",
-    "Public domain": "PD",
-    "Python Software Foundation License": "Python-2.0",
-    "Python style": "Python-2.0",
-    "Python-2.0": "Python-2.0",
-    "QPL-1.0": "QPL-1.0",
-    "RHeCos-1": "RHeCos-1",
-    "RHeCos-1.1": "RHeCos-1.1",
-    "RPL-1.5": "RPL-1.5",
-    "RPSL-1.0": "RPSL-1.0",
-    "RSCPL": "RSCPL",
-    "Ruby": "Ruby",
-    "SAX-PD": "SAX-PD",
-    "SGI-1": "SGI-1",
-    "SPL-1.0": "SPL-1.0",
-    "Simple-2.0": "Simple-2.0",
-    "Sleepycat": "Sleepycat",
-    "SugarCRM-1": "SugarCRM-1",
-    "SugarCRM-1.1.3": "SugarCRM-1.1.3",
-    "This software released into the public domain. Anyone is free to copy,": "PD",
-    "Two-clause BSD license": "BSD-2-Clause",
-    "UCB": "UCB",
-    "UNKNOWN": "CLOSED",
-    "VSL-1.0": "VSL-1.0",
-    "W3C": "W3C",
-    "WXwindows": "WXwindows",
-    "Watcom-1.0": "Watcom-1.0",
-    "XFree86-1.0": "XFree86-1.0",
-    "XFree86-1.1": "XFree86-1.1",
-    "XSL": "XSL",
-    "Xnet": "Xnet",
-    "YPL-1.1": "YPL-1.1",
-    "ZPL 2.1": "ZPL-2.0",
-    "ZPL-1.1": "ZPL-1.1",
-    "ZPL-2.0": "ZPL-2.0",
-    "ZPL-2.1": "ZPL-2.1",
-    "Zimbra-1.3": "Zimbra-1.3",
-    "Zlib": "Zlib",
-    "eCos-2.0": "eCos-2.0",
-    "gSOAP-1": "gSOAP-1",
-    "gSOAP-1.3b": "gSOAP-1.3b",
-    "http://creativecommons.org/publicdomain/zero/1.0/": "PD",
-    "http://opensource.org/licenses/MIT": "MIT",
-    "public domain, Python, 2-Clause BSD, GPL 3 (see COPYING.txt)": "PD",
-}
+import ast
+import functools
+import itertools
+import json
+import re
+import sys
+import threading
+import types
+from array import array
+from collections import namedtuple
+from dataclasses import dataclass
+
+# Returned for names that cannot be mapped. It is interned, as are all the
+# table values, so callers can test results with "is CLOSED".
+CLOSED = sys.intern("CLOSED")
+
+# Keep this a literal tuple of string pairs: the compiler folds it into a
+# single constant that is loaded straight from the .pyc on import.
+_RAW = (
+    ("AAL", "AAL"),
+    ("AFL-1.2", "AFL-1.2"),
+    ("AFL-2.0", "AFL-2.0"),
+    ("AFL-2.1", "AFL-2.1"),
+    ("AFL-3.0", "AFL-3.0"),
+    ("AGPL-3.0", "AGPL-3.0"),
+    ("ANTLR-PD", "ANTLR-PD"),
+    ("APL-1.0", "APL-1.0"),
+    ("APL2", "Apache-2.0"),
+    ("APSL-1.0", "APSL-1.0"),
+    ("APSL-1.1", "APSL-1.1"),
+    ("APSL-1.2", "APSL-1.2"),
+    ("APSL-2.0", "APSL-2.0"),
+    ("ASL", "Apache-2.0"),
+    ("Adobe", "Adobe"),
+    ("Apache", "Apache-2.0"),
+    ("Apache 2.0", "Apache-2.0"),
+    ("Apache License, Version 2.0", "Apache-2.0"),
+    ("Apache Software License, Version 2", "Apache-2.0"),
+    ("Apache Software License", "Apache-2.0"),
+    ("Apache-2.0 WITH LLVM-exception", "Apache-2.0-with-LLVM-exception"),
+    ("Apache-1.0", "Apache-1.0"),
+    ("Apache-1.1", "Apache-1.1"),
+    ("Apache-2.0", "Apache-2.0"),
+    ("Artistic-1.0", "Artistic-1.0"),
+    ("Artistic-2.0", "Artistic-2.0"),
+    ("BSD", "BSD"),
+    ("BSD - See ndg/httpsclient/LICENCE file for details", "BSD"),
+    ("BSD 3-Clause", "BSD-3-Clause"),
+    ("BSD or Apache License, Version 2.0", "BSD"),
+    ("BSD, Public Domain", "BSD"),
+    ("BSD-2-Clause", "BSD-2-Clause"),
+    ("BSD-3-Clause", "BSD-3-Clause"),
+    ("BSD-4-Clause", "BSD-4-Clause"),
+    ("BSD-derived (http://www.repoze.org/LICENSE.txt)", "BSD"),
+    ("BSD-like", "BSD"),
+    ("BSL-1.0", "BSL-1.0"),
+    ("BitstreamVera", "BitstreamVera"),
+    ("CATOSL-1.1", "CATOSL-1.1"),
+    ("CC-BY-1.0", "CC-BY-1.0"),
+    ("CC-BY-2.0", "CC-BY-2.0"),
+    ("CC-BY-2.5", "CC-BY-2.5"),
+    ("CC-BY-3.0", "CC-BY-3.0"),
+    ("CC-BY-NC-1.0", "CC-BY-NC-1.0"),
+    ("CC-BY-NC-2.0", "CC-BY-NC-2.0"),
+    ("CC-BY-NC-2.5", "CC-BY-NC-2.5"),
+    ("CC-BY-NC-3.0", "CC-BY-NC-3.0"),
+    ("CC-BY-NC-ND-1.0", "CC-BY-NC-ND-1.0"),
+    ("CC-BY-NC-ND-2.0", "CC-BY-NC-ND-2.0"),
+    ("CC-BY-NC-ND-2.5", "CC-BY-NC-ND-2.5"),
+    ("CC-BY-NC-ND-3.0", "CC-BY-NC-ND-3.0"),
+    ("CC-BY-NC-SA-1.0", "CC-BY-NC-SA-1.0"),
+    ("CC-BY-NC-SA-2.0", "CC-BY-NC-SA-2.0"),
+    ("CC-BY-NC-SA-2.5", "CC-BY-NC-SA-2.5"),
+    ("CC-BY-NC-SA-3.0", "CC-BY-NC-SA-3.0"),
+    ("CC-BY-ND-1.0", "CC-BY-ND-1.0"),
+    ("CC-BY-ND-2.0", "CC-BY-ND-2.0"),
+    ("CC-BY-ND-2.5", "CC-BY-ND-2.5"),
+    ("CC-BY-ND-3.0", "CC-BY-ND-3.0"),
+    ("CC-BY-SA-1.0", "CC-BY-SA-1.0"),
+    ("CC-BY-SA-2.0", "CC-BY-SA-2.0"),
+    ("CC-BY-SA-2.5", "CC-BY-SA-2.5"),
+    ("CC-BY-SA-3.0", "CC-BY-SA-3.0"),
+    ("CC0-1.0", "CC0-1.0"),
+    ("CDDL-1.0", "CDDL-1.0"),
+    ("CECILL-1.0", "CECILL-1.0"),
+    ("CECILL-2.0", "CECILL-2.0"),
+    ("CECILL-B", "CECILL-B"),
+    ("CECILL-C", "CECILL-C"),
+    ("CPAL-1.0", "CPAL-1.0"),
+    ("CPL-1.0", "CPL-1.0"),
+    ("CUA-OPL-1.0", "CUA-OPL-1.0"),
+    ("ClArtistic", "ClArtistic"),
+    ("DSSSL", "DSSSL"),
+    ("Dual License", "BSD"),
+    ("ECL-1.0", "ECL-1.0"),
+    ("ECL-2.0", "ECL-2.0"),
+    ("EDL-1.0", "EDL-1.0"),
+    ("EFL-1.0", "EFL-1.0"),
+    ("EFL-2.0", "EFL-2.0"),
+    ("EPL-1.0", "EPL-1.0"),
+    ("EPL-2.0", "EPL-2.0"),
+    ("EUDatagrid", "EUDatagrid"),
+    ("EUPL-1.0", "EUPL-1.0"),
+    ("EUPL-1.1", "EUPL-1.1"),
+    ("Elfutils-Exception", "Elfutils-Exception"),
+    ("Entessa", "Entessa"),
+    ("ErlPL-1.1", "ErlPL-1.1"),
+    ("Expat license", "MIT"),
+    ("Expat (MIT/X11)", "MIT"),
+    ("Fair", "Fair"),
+    ("Frameworx-1.0", "Frameworx-1.0"),
+    ("FreeType", "FreeType"),
+    ("GFDL-1.1", "GFDL-1.1"),
+    ("GFDL-1.2", "GFDL-1.2"),
+    ("GFDL-1.3", "GFDL-1.3"),
+    ("GNU GPLv3+", "GPL-3.0"),
+    ("GNU General Public License Version 3", "GPL-3.0"),
+    ("GNU LGPL", "LGPL-2.0"),
+    ("GPL", "GPL-1.0"),
+    ("GPL V2 or later", "GPL-2.0"),
+    ("GPL-1.0", "GPL-1.0"),
+    ("GPL-2-with-bison-exception", "GPL-2-with-bison-exception"),
+    ("GPL-2.0", "GPL-2.0"),
+    ("GPL-2.0-with-GCC-exception", "GPL-2.0-with-GCC-exception"),
+    ("GPL-2.0-with-autoconf-exception", "GPL-2.0-with-autoconf-exception"),
+    ("GPL-2.0-with-classpath-exception", "GPL-2.0-with-classpath-exception"),
+    ("GPL-2.0-with-font-exception", "GPL-2.0-with-font-exception"),
+    ("GPL-3.0", "GPL-3.0"),
+    ("GPL-3.0-with-GCC-exception", "GPL-3.0-with-GCC-exception"),
+    ("GPL-3.0-with-autoconf-exception", "GPL-3.0-with-autoconf-exception"),
+    ("GPLv3+", "GPLv3"),
+    ("HPND", "HPND"),
+    ("IPA", "IPA"),
+    ("IPL-1.0", "IPL-1.0"),
+    ("ISC", "ISC"),
+    ("LGPL", "LGPL-2.0"),
+    ("LGPL-2.0", "LGPL-2.0"),
+    ("LGPL-2.1", "LGPL-2.1"),
+    ("LGPL-3.0", "LGPL-3.0"),
+    ("LGPLv2", "LGPL-2.0"),
+    ("LGPLv2+", "LGPL-2.0"),
+    ("LGPLv3", "LGPL-3.0"),
+    ("LPGL, see LICENSE file.", "LGPL-1.0"),
+    ("LPL-1.02", "LPL-1.02"),
+    ("LPPL-1.0", "LPPL-1.0"),
+    ("LPPL-1.1", "LPPL-1.1"),
+    ("LPPL-1.2", "LPPL-1.2"),
+    ("LPPL-1.3c", "LPPL-1.3c"),
+    ("Libpng", "Libpng"),
+    ("License :: OSI Approved :: MIT License (http://opensource.org/licenses/MIT)", "MIT"),
+    ("MIT", "MIT"),
+    ("MIT/X11", "MIT"),
+    ("MIT-CMU", "MIT-CMU"),
+    ("MPL v2", "MPL-2.0"),
+    ("MPL-1.0", "MPL-1.0"),
+    ("MPL-1.1", "MPL-1.1"),
+    ("MPL-2.0", "MPL-2.0"),
+    ("MPLv2.0, MIT Licences", "MIT"),
+    ("MS-PL", "MS-PL"),
+    ("MS-RL", "MS-RL"),
+    ("MirOS", "MirOS"),
+    ("Modified BSD License", "BSD"),
+    ("Motosoto", "Motosoto"),
+    ("Multics", "Multics"),
+    ("NASA-1.3", "NASA-1.3"),
+    ("NCSA", "NCSA"),
+    ("NGPL", "NGPL"),
+    ("NPOSL-3.0", "NPOSL-3.0"),
+    ("NTP", "NTP"),
+    ("Nauman", "Nauman"),
+    ("New BSD", "BSD"),
+    ("Nokia", "Nokia"),
+    ("OASIS", "OASIS"),
+    ("OCLC-2.0", "OCLC-2.0"),
+    ("ODbL-1.0", "ODbL-1.0"),
+    ("OFL-1.1", "OFL-1.1"),
+    ("OGTSL", "OGTSL"),
+    ("OLDAP-2.8", "OLDAP-2.8"),
+    ("OSL-1.0", "OSL-1.0"),
+    ("OSL-2.0", "OSL-2.0"),
+    ("OSL-3.0", "OSL-3.0"),
+    ("OpenSSL", "OpenSSL"),
+    ("PD", "PD"),
+    ("PHP-3.0", "PHP-3.0"),
+    ("PSF", "Python-2.0"),
+    ("PSFL", "Python-2.0"),
+    ("PostgreSQL", "PostgreSQL"),
+    ("Proprietary", "Proprietary"),
+    ("Public Domain", "PD"),
+    ("Python Software Foundation License", "Python-2.0"),
+    ("Python style", "Python-2.0"),
+    ("Python-2.0", "Python-2.0"),
+    ("QPL-1.0", "QPL-1.0"),
+    ("RHeCos-1", "RHeCos-1"),
+    ("RHeCos-1.1", "RHeCos-1.1"),
+    ("RPL-1.5", "RPL-1.5"),
+    ("RPSL-1.0", "RPSL-1.0"),
+    ("RSCPL", "RSCPL"),
+    ("Ruby", "Ruby"),
+    ("SAX-PD", "SAX-PD"),
+    ("SGI-1", "SGI-1"),
+    ("SPL-1.0", "SPL-1.0"),
+    ("Simple-2.0", "Simple-2.0"),
+    ("Sleepycat", "Sleepycat"),
+    ("SugarCRM-1", "SugarCRM-1"),
+    ("SugarCRM-1.1.3", "SugarCRM-1.1.3"),
+    ("This software released into the public domain. Anyone is free to copy,", "PD"),
+    ("Two-clause BSD license", "BSD-2-Clause"),
+    ("UCB", "UCB"),
+    ("UNKNOWN", "CLOSED"),
+    ("VSL-1.0", "VSL-1.0"),
+    ("W3C", "W3C"),
+    ("WXwindows", "WXwindows"),
+    ("Watcom-1.0", "Watcom-1.0"),
+    ("XFree86-1.0", "XFree86-1.0"),
+    ("XFree86-1.1", "XFree86-1.1"),
+    ("XSL", "XSL"),
+    ("Xnet", "Xnet"),
+    ("YPL-1.1", "YPL-1.1"),
+    ("ZPL 2.1", "ZPL-2.0"),
+    ("ZPL-1.1", "ZPL-1.1"),
+    ("ZPL-2.0", "ZPL-2.0"),
+    ("ZPL-2.1", "ZPL-2.1"),
+    ("Zimbra-1.3", "Zimbra-1.3"),
+    ("Zlib", "Zlib"),
+    ("eCos-2.0", "eCos-2.0"),
+    ("gSOAP-1", "gSOAP-1"),
+    ("gSOAP-1.3b", "gSOAP-1.3b"),
+    ("http://creativecommons.org/publicdomain/zero/1.0/", "PD"),
+    ("http://opensource.org/licenses/MIT", "MIT"),
+    ("public domain, Python, 2-Clause BSD, GPL 3 (see COPYING.txt)", "PD"),
+)
+
+_CLASSIFIER_PREFIX = re.compile(r"^license\s*::\s*(osi approved\s*::\s*)?")
+_LICENSE_WORD = re.compile(r"licen[cs]e")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def _norm(name):
+    """Folds case, classifier prefixes and the word 'license' out of a name."""
+    name = _CLASSIFIER_PREFIX.sub("", name.lower())
+    name = _LICENSE_WORD.sub("", name)
+    return _WHITESPACE.sub(" ", name).strip()
+
+
+# Trie nodes are nested dicts keyed by character; the license mapped by the
+# key ending at a node is stored under _VALUE.
+_VALUE = None
+
+
+def _trie_insert(trie, key, license):
+    node = trie
+    for char in key:
+        node = node.setdefault(char, {})
+    node[_VALUE] = license
+
+
+# A trailing "(see LICENSE.txt)" style remark. Remarks carrying a version or
+# naming another license ("(v2)", "(or Apache-2.0)") change what the license
+# is, so they are not comments.
+_COMMENT = re.compile(r"\s*\((?![^()]*(?:\d|\b(?:or|and|with)\b))[^()]*\)\s*")
+
+
+def _longest_prefix(trie, name):
+    """Returns the license of the longest key that name only extends by a comment."""
+    node = trie
+    match = None
+    for i, char in enumerate(name):
+        if _VALUE in node and _COMMENT.fullmatch(name, i):
+            match = node[_VALUE]
+        node = node.get(char)
+        if node is None:
+            return match
+    return node.get(_VALUE, match)
+
+
+def _distance(a, b, max_distance):
+    """Levenshtein distance of a and b, or max_distance + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return min(previous[-1], max_distance + 1)
+
+
+class _LMap(dict):
+    """A dict that resolves missing keys through lookup(), else raises KeyError."""
+
+    __slots__ = ()
+
+    def __missing__(self, key):
+        license = lookup(key, None) if isinstance(key, str) else None
+        if license is None:
+            raise KeyError(key)
+        return license
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+# The names most packages on PyPI actually declare, in either the license
+# field or a classifier. They are probed before the full table.
+_HOT = (
+    "AGPL-3.0",
+    "Apache",
+    "Apache 2.0",
+    "Apache Software License",
+    "Apache-2.0",
+    "BSD",
+    "BSD 3-Clause",
+    "BSD-2-Clause",
+    "BSD-3-Clause",
+    "GPL",
+    "GPL-2.0",
+    "GPL-3.0",
+    "GPLv3+",
+    "ISC",
+    "LGPL",
+    "LGPL-2.1",
+    "LGPL-3.0",
+    "LGPLv3",
+    "MIT",
+    "MPL-2.0",
+    "PSF",
+    "Public Domain",
+    "Python Software Foundation License",
+    "Python-2.0",
+    "UNKNOWN",
+    "Zlib",
+)
+
+
+def _perfect_hash(keys):
+    """Places every key in its own slot of a table of len(keys) slots.
+
+    Keys are grouped into buckets by hash(key); each bucket then gets a
+    displacement d such that hash((d, key)) lands its keys on free slots.
+    Single-key buckets store -(slot + 1) to point at a free slot directly.
+    Returns the displacements and the keys in slot order.
+    """
+    size = len(keys)
+    buckets = [[] for _ in range(size)]
+    for key in keys:
+        buckets[hash(key) % size].append(key)
+
+    displacements = array("i", bytes(4 * size))
+    slots = [None] * size
+    order = sorted(range(size), key=lambda b: len(buckets[b]), reverse=True)
+    for b in order:
+        bucket = buckets[b]
+        if len(bucket) <= 1:
+            break
+        d = 1
+        while True:
+            positions = [hash((d, key)) % size for key in bucket]
+            if len(set(positions)) == len(bucket) and all(
+                slots[p] is None for p in positions
+            ):
+                break
+            d += 1
+        displacements[b] = d
+        for key, position in zip(bucket, positions):
+            slots[position] = key
+
+    free = (slot for slot, key in enumerate(slots) if key is None)
+    for b in order:
+        if len(buckets[b]) == 1:
+            slot = next(free)
+            displacements[b] = -slot - 1
+            slots[slot] = buckets[b][0]
+
+    return displacements, slots
+
+
+# The normalized names are packed, in perfect hash slot order (see
+# _perfect_hash), into one UTF-8 blob; slot i spans offsets[i]:offsets[i + 1].
+# values holds, at the same index, the position of each key's license in
+# vocab. Every distinct license string is stored once in vocab. resolve and
+# scanner are the memoized lookup and scan helpers bound to these tables.
+# Names are encoded with surrogatepass, since PyPI metadata and the license
+# prompt can both produce lone surrogates.
+_Tables = namedtuple(
+    "_Tables",
+    [
+        "table",
+        "blob",
+        "offsets",
+        "values",
+        "displacements",
+        "vocab",
+        "trie",
+        "hot",
+        "licenses",
+        "resolve",
+        "scanner",
+    ],
+)
+
+# The tables are never changed once built: register() builds new ones and
+# swaps them in, so every reader sees one consistent set together with its
+# own caches.
+_TABLES = None
+_TABLES_LOCK = threading.Lock()
+# User supplied mappings, in the order they were registered.
+_REGISTERED = ()
+
+
+def _build(pairs):
+    """Builds the tables from (name, license) pairs, later pairs winning."""
+    table = _LMap(pairs)
+    canon = {_norm(k): v for k, v in pairs}
+    vocab = sorted(set(table.values()))
+    index = {license: i for i, license in enumerate(vocab)}
+    trie = {}
+    for key, license in canon.items():
+        _trie_insert(trie, key, license)
+    hot = {_norm(name): canon[_norm(name)] for name in _HOT}
+
+    displacements, keys = _perfect_hash(list(canon))
+    encoded = [key.encode("utf-8", "surrogatepass") for key in keys]
+    offsets = array("I", [0])
+    for key in encoded:
+        offsets.append(offsets[-1] + len(key))
+
+    tables = _Tables(
+        table,
+        b"".join(encoded),
+        offsets,
+        array("H", (index[canon[key]] for key in keys)),
+        displacements,
+        vocab,
+        trie,
+        hot,
+        types.MappingProxyType(table),
+        None,
+        None,
+    )
+    # The helpers only read the fields above, so they can be bound to this
+    # copy before it is completed.
+    return tables._replace(
+        resolve=functools.lru_cache(maxsize=2048)(functools.partial(_resolve, tables)),
+        scanner=functools.lru_cache(maxsize=None)(functools.partial(_scanner, table)),
+    )
+
+
+def _pairs():
+    return tuple((sys.intern(k), sys.intern(v)) for k, v in _RAW) + _REGISTERED
+
+
+def _tables():
+    global _TABLES
+    if _TABLES is None:
+        with _TABLES_LOCK:
+            if _TABLES is None:
+                _TABLES = _build(_pairs())
+    return _TABLES
+
+
+def _keys(tables):
+    offsets = tables.offsets
+    for slot in range(len(tables.values)):
+        yield tables.blob[offsets[slot] : offsets[slot + 1]]
+
+
+def _find(tables, name):
+    size = len(tables.values)
+    d = tables.displacements[hash(name) % size]
+    slot = -d - 1 if d < 0 else hash((d, name)) % size
+    encoded = name.encode("utf-8", "surrogatepass")
+    start = tables.offsets[slot]
+    if tables.offsets[slot + 1] - start == len(encoded) and tables.blob.startswith(
+        encoded, start
+    ):
+        return tables.vocab[tables.values[slot]]
+    return None
+
+
+def __getattr__(name):
+    # LICENSES is only materialized the first time somebody asks for it.
+    if name == "LICENSES":
+        return _tables().licenses
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def lookup(name, default=CLOSED):
+    """Maps a free form license name or classifier to an OE license.
+
+    Exact matches on the normalized name win; otherwise the longest known
+    name followed only by a parenthesized comment is used, so strings such
+    as "MIT License (see LICENSE.txt)" still resolve. Near misses are never
+    guessed at here; use fuzzy_lookup() for that.
+
+    Results are cached, so the table must only be changed through register().
+    """
+    license = _tables().resolve(name)
+    return default if license is None else license
+
+
+def _resolve(tables, name):
+    name = _norm(name)
+    license = tables.hot.get(name)
+    if license is None:
+        license = _find(tables, name)
+    if license is None:
+        license = _longest_prefix(tables.trie, name)
+    return license
+
+
+def lookup_many(names, default=CLOSED):
+    """Maps every name in names with lookup(), returning a list in the same order."""
+    return list(map(lookup, names, itertools.repeat(default)))
+
+
+def _nearest(name, cutoff):
+    # Short names get a proportionally smaller budget so that e.g. "foo"
+    # does not turn into "mit".
+    limit = min(cutoff, len(name) // 4)
+    nearest = None
+    tables = _tables()
+    # The distance is taken over the UTF-8 bytes so the packed keys never
+    # have to be decoded. Keys are walked in sorted order, not slot order,
+    # so ties do not depend on the str hash seed.
+    name = name.encode("utf-8", "surrogatepass")
+    for key, value in sorted(zip(_keys(tables), tables.values)):
+        distance = _distance(name, key, limit)
+        if distance <= limit:
+            nearest = tables.vocab[value]
+            if distance == 0:
+                break
+            limit = distance - 1
+    return nearest
+
+
+def fuzzy_lookup(name, cutoff=3, default=CLOSED):
+    """Maps name to the license of the closest known name within cutoff edits."""
+    license = _nearest(_norm(name), cutoff)
+    return default if license is None else license
+
+
+# OSI approved licenses among the table values.
+_OSI = frozenset(
+    (
+        "AAL", "AFL-1.2", "AFL-2.0", "AFL-2.1", "AFL-3.0", "AGPL-3.0",
+        "APL-1.0", "APSL-2.0", "Apache-1.1", "Apache-2.0",
+        "Apache-2.0-with-LLVM-exception", "Artistic-1.0", "Artistic-2.0",
+        "BSD-2-Clause", "BSD-3-Clause", "BSL-1.0", "CATOSL-1.1", "CDDL-1.0",
+        "CPAL-1.0", "CPL-1.0", "CUA-OPL-1.0", "ECL-1.0", "ECL-2.0", "EFL-1.0",
+        "EFL-2.0", "EPL-1.0", "EPL-2.0", "EUDatagrid", "EUPL-1.1", "Entessa",
+        "Fair", "Frameworx-1.0", "GPL-2.0", "GPL-3.0", "GPLv3", "HPND", "IPA",
+        "IPL-1.0", "ISC", "LGPL-2.0", "LGPL-2.1", "LGPL-3.0", "LPL-1.02",
+        "LPPL-1.3c", "MIT", "MPL-1.0", "MPL-1.1", "MPL-2.0", "MS-PL", "MS-RL",
+        "MirOS", "Motosoto", "Multics", "NASA-1.3", "NCSA", "NGPL",
+        "NPOSL-3.0", "NTP", "Nauman", "Nokia", "OCLC-2.0", "OFL-1.1", "OGTSL",
+        "OSL-1.0", "OSL-2.0", "OSL-3.0", "PHP-3.0", "PostgreSQL", "Python-2.0",
+        "QPL-1.0", "RPL-1.5", "RPSL-1.0", "RSCPL", "SPL-1.0", "Simple-2.0",
+        "Sleepycat", "VSL-1.0", "W3C", "Watcom-1.0", "Xnet", "ZPL-2.0",
+        "ZPL-2.1", "Zlib",
+    )
+)
+
+# Licenses that require derived works to be distributed under the same terms.
+_COPYLEFT = frozenset(
+    (
+        "AGPL-3.0", "APSL-2.0", "CC-BY-NC-SA-1.0", "CC-BY-NC-SA-2.0",
+        "CC-BY-NC-SA-2.5", "CC-BY-NC-SA-3.0", "CC-BY-SA-1.0", "CC-BY-SA-2.0",
+        "CC-BY-SA-2.5", "CC-BY-SA-3.0", "CDDL-1.0", "CECILL-1.0", "CECILL-2.0",
+        "CECILL-C", "CPL-1.0", "EPL-1.0", "EPL-2.0", "EUPL-1.0", "EUPL-1.1",
+        "ErlPL-1.1", "GFDL-1.1", "GFDL-1.2", "GFDL-1.3", "GPL-1.0",
+        "GPL-2-with-bison-exception", "GPL-2.0", "GPL-2.0-with-GCC-exception",
+        "GPL-2.0-with-autoconf-exception", "GPL-2.0-with-classpath-exception",
+        "GPL-2.0-with-font-exception", "GPL-3.0", "GPL-3.0-with-GCC-exception",
+        "GPL-3.0-with-autoconf-exception", "GPLv3", "IPL-1.0", "LGPL-1.0",
+        "LGPL-2.0", "LGPL-2.1", "LGPL-3.0", "MPL-1.0", "MPL-1.1", "MPL-2.0",
+        "MS-RL", "NPOSL-3.0", "OFL-1.1", "OSL-1.0", "OSL-2.0", "OSL-3.0",
+        "QPL-1.0", "RPL-1.5", "RPSL-1.0", "SPL-1.0", "Sleepycat",
+    )
+)
+
+
+@dataclass(frozen=True)
+class LicenseInfo:
+    """What pipoe knows about an OE license beyond its name."""
+
+    __slots__ = ("spdx_id", "is_osi", "is_copyleft")
+
+    spdx_id: str
+    is_osi: bool
+    is_copyleft: bool
+
+
+@functools.lru_cache(maxsize=None)
+def _info(license):
+    return LicenseInfo(license, license in _OSI, license in _COPYLEFT)
+
+
+def license_info(name, default=CLOSED):
+    """Like lookup(), but returns the shared LicenseInfo of the mapped license."""
+    license = lookup(name, default)
+    return None if license is None else _info(license)
+
+
+def _scanner(table):
+    # Longest names first so the alternation prefers "BSD 3-Clause" over "BSD".
+    # Names such as "UNKNOWN" that only map to CLOSED are not licenses found.
+    names = sorted(
+        (name for name, license in table.items() if license != CLOSED),
+        key=len,
+        reverse=True,
+    )
+    # Each name is its own group; lastindex tells which one matched, since
+    # the matched text may not case fold back to the name.
+    pattern = re.compile(
+        r"(?<!\w)(?:{})(?!\w)".format(
+            "|".join("({})".format(re.escape(n)) for n in names)
+        ),
+        re.IGNORECASE,
+    )
+    return pattern, [None] + [table[name] for name in names]
+
+
+def scan(text):
+    """Returns the licenses of every known license name found in text, in order.
+
+    Every table key is matched case-insensitively as a whole word, including
+    short ids such as "PD", "ASL" or "Fair" that also occur in ordinary prose,
+    so treat the results as candidates rather than a classification.
+    """
+    pattern, licenses = _tables().scanner()
+    return [licenses[m.lastindex] for m in pattern.finditer(text)]
+
+
+def register(name, license):
+    """Adds a user supplied mapping to the license table."""
+    global _TABLES, _REGISTERED
+    with _TABLES_LOCK:
+        _REGISTERED += ((sys.intern(name), sys.intern(license)),)
+        _TABLES = _build(_pairs())
+
+
+def _literal(text):
+    # JSON string escapes are valid Python ones. Text that cannot be written
+    # as UTF-8, such as a lone surrogate, is escaped to ASCII instead.
+    literal = json.dumps(text, ensure_ascii=False)
+    try:
+        literal.encode("utf-8")
+    except UnicodeEncodeError:
+        literal = json.dumps(text)
+    return literal
+
+
+def source():
+    """Returns the source of this module with the registered mappings merged into _RAW."""
+    pairs = dict(_RAW)
+    pairs.update(_REGISTERED)
+
+    with open(__file__, encoding="utf-8") as f:
+        text = f.read()
+    node = next(
+        node
+        for node in ast.parse(text).body
+        if isinstance(node, ast.Assign)
+        and any(getattr(target, "id", None) == "_RAW" for target in node.targets)
+    )
+    lines = text.splitlines(keepends=True)
+    raw = ["_RAW = (\n"]
+    raw.extend(
+        "    ({}, {}),\n".format(_literal(name), _literal(license))
+        for name, license in pairs.items()
+    )
+    raw.append(")\n")
+    return "".join(lines[: node.lineno - 1] + raw + lines[node.end_lineno :])
@@ -1,25 +1,36 @@
 #!/usr/bin/env python3
 
 import argparse
+import ast
 import os
 import os.path
+import posixpath
 import re
 import sys
-import urllib.request
 import hashlib
 import shutil
+import string
 import json
 import tarfile
 import tempfile
 import zipfile
-import mmap
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pep508_parser import parser
 from pipoe import licenses
-from functools import partial
-from collections import namedtuple
-from pprint import pformat
+from functools import lru_cache, partial
+from dataclasses import dataclass, replace
 
 import pkginfo
+from packaging.version import InvalidVersion, Version
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
 
 BB_TEMPLATE = """
 SUMMARY = "{summary}"
@@ -76,9 +87,34 @@ BBCLASSEXTEND = "native nativesdk"
 """
 
 
-Package = namedtuple(
-    "Package",
-    [
+def compile_template(template):
+    """ Turns a str.format template into a keyword-only f-string function """
+    # The template is pasted into source code below, so it must not be able
+    # to close the f-string or start an escape sequence
+    if "'''" in template or "\\" in template or template.endswith("'"):
+        raise ValueError("Template cannot be compiled: contains quotes or a backslash")
+    fields = sorted({
+        field for _, field, _, _ in string.Formatter().parse(template) if field
+    })
+    for field in fields:
+        if not field.isidentifier():
+            raise ValueError("Template field is not a plain name: {}".format(field))
+    source = "def render(*, {}, **_):\n    return f'''{}'''\n".format(
+        ", ".join(fields), template
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace["render"]
+
+
+RENDER_BB = compile_template(BB_TEMPLATE)
+RENDER_BB_PYPI = compile_template(BB_TEMPLATE_PYPI)
+RENDER_BB_EXTRA = compile_template(BB_EXTRA_TEMPLATE)
+
+
+@dataclass
+class Package:
+    __slots__ = (
         "name",
         "version",
         "summary",
@@ -94,55 +130,193 @@ Package = namedtuple(
         "src_sha256",
         "dependencies",
         "build_dependencies",
-    ],
-)
+    )
 
-Dependency = namedtuple("Dependency", ["name", "version", "extra"])
+    name: str
+    version: str
+    summary: str
+    homepage: str
+    author: str
+    author_email: str
+    license: str
+    license_file: str
+    license_md5: str
+    src_dir: str
+    src_uri: str
+    src_md5: str
+    src_sha256: str
+    dependencies: list
+    build_dependencies: list
 
 
-def md5sum(path):
-    with open(path, mode="rb") as f:
-        d = hashlib.md5()
-        for buf in iter(partial(f.read, 128), b""):
+@dataclass
+class Dependency:
+    __slots__ = ("name", "version", "extra")
+
+    name: str
+    version: str
+    extra: str
+
+
+HTTP_TIMEOUT = 30
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# One keep-alive session, pooled per host, shared by every PyPI and sdist request
+SESSION = requests.Session()
+
+
+def mount_session(pool_maxsize):
+    SESSION.mount(
+        "https://", HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize)
+    )
+
+
+mount_session(32)
+
+
+def write_file(path, text):
+    """ Writes text to path with unbuffered writes, normally a single one """
+    data = memoryview(text.encode("utf-8"))
+    # 0o666 like open(path, "w"), so the umask decides the final mode
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+# Archives must be stored and hashed exactly as served, like pip does, so
+# never let a Content-Encoding be negotiated or decoded for them
+DOWNLOAD_HEADERS = {"Accept-Encoding": "identity"}
+
+
+def download(uri, path, hasher=None):
+    """ Streams uri to path, feeding every chunk to hasher if one is given """
+    with SESSION.get(
+        uri, headers=DOWNLOAD_HEADERS, stream=True, timeout=HTTP_TIMEOUT
+    ) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.raw.stream(
+                DOWNLOAD_CHUNK_SIZE, decode_content=False
+            ):
+                f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+
+
+HASH_BUFFER_SIZE = 1 << 20
+# hashlib only reaches the fast (SHA-NI) OpenSSL paths with large updates
+HASH_MIN_UPDATE = 1 << 16
+
+
+def file_digest(path, algorithm):
+    with open(path, mode="rb", buffering=0) as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, algorithm).hexdigest()
+
+        d = hashlib.new(algorithm)
+        for buf in iter(partial(f.read, HASH_BUFFER_SIZE), b""):
             d.update(buf)
     return d.hexdigest()
 
 
+class BufferedHash:
+    """ Feeds several hash objects in updates of at least HASH_MIN_UPDATE bytes """
+
+    __slots__ = ("hashes", "buf")
+
+    def __init__(self, *algorithms):
+        self.hashes = tuple(hashlib.new(a) for a in algorithms)
+        self.buf = bytearray()
+
+    def _feed(self, data):
+        for h in self.hashes:
+            h.update(data)
+
+    def update(self, data):
+        if not self.buf and len(data) >= HASH_MIN_UPDATE:
+            self._feed(data)
+            return
+
+        self.buf += data
+        if len(self.buf) >= HASH_MIN_UPDATE:
+            self._feed(self.buf)
+            self.buf.clear()
+
+    def hexdigests(self):
+        if self.buf:
+            self._feed(self.buf)
+            self.buf.clear()
+        return tuple(h.hexdigest() for h in self.hashes)
+
+
+def md5sum(path):
+    return file_digest(path, "md5")
+
+
 def sha256sum(path):
-    with open(path, mode="rb") as f:
-        d = hashlib.sha256()
-        for buf in iter(partial(f.read, 128), b""):
-            d.update(buf)
-    return d.hexdigest()
+    return file_digest(path, "sha256")
 
 
+@lru_cache(maxsize=None)
 def package_to_bb_name(package):
     return package.lower().replace("_", "-").replace(".", "-")
 
 
 def translate_license(license, classifiers, default_license):
-    try:
-        try:
-            if license not in [ '', None ]:
-                return licenses.LICENSES[license.strip("'").strip('"')]
-        except:
-            pass
-
-        for classifier in classifiers:
-            if classifier.startswith("License"):
-                return licenses.LICENSES[classifier]
-
-        raise Exception("No license found")
-    except:
-        if default_license:
-            return default_license
+    if license not in ["", None]:
+        mapping = licenses.lookup(license.strip("'").strip('"'), None)
+        if mapping is not None:
+            return mapping
+
+    license_classifiers = [c for c in classifiers if c.startswith("License")]
+    for mapping in licenses.lookup_many(license_classifiers, None):
+        if mapping is not None:
+            return mapping
+
+    if default_license:
+        return default_license
+
+    # Packages are gathered from several threads, so prompt one at a time and
+    # reuse any answer given for the same string in the meantime.
+    with PROMPT_LOCK:
+        if license:
+            mapping = licenses.lookup(license, None)
+            if mapping is not None:
+                return mapping
 
         print("Failed to translate license: {}".format(license))
         mapping = input("Please enter a valid license name: ")
-        licenses.LICENSES[license] = mapping
+        if license:
+            licenses.register(license, mapping)
         return mapping
 
 
+UNPACK_BUFFER_SIZE = 1 << 20
+
+
+def split_member_name(name):
+    """ Splits an archive member name into its path parts, None if unsafe """
+    parts = posixpath.normpath(name).split("/")
+    if parts[0] in ("", ".", ".."):
+        return None
+    return parts
+
+
+def is_needed_member(parts):
+    """ Only the top level build files and license candidates are needed """
+    if len(parts) != 2:
+        return False
+    filename = parts[1].lower()
+    return (
+        filename in ("setup.py", "pyproject.toml")
+        or "license" in filename
+        or "copying" in filename
+    )
+
+
 def unpack_package(file):
     tmpdir = "{}.d".format(file)
 
@@ -150,45 +324,137 @@ def unpack_package(file):
         shutil.rmtree(tmpdir)
 
     os.mkdir(tmpdir)
-    shutil.unpack_archive(file, extract_dir=tmpdir)
+
+    if file.endswith(".zip"):
+        archive = zipfile.ZipFile(file)
+        members = (
+            (info.filename, not info.is_dir(), partial(archive.open, info))
+            for info in archive.infolist()
+        )
+    else:
+        archive = tarfile.open(file, "r:*")
+        members = (
+            (info.name, info.isfile(), partial(archive.extractfile, info))
+            for info in archive
+        )
+
+    with archive:
+        top_dirs = set()
+        for name, is_file, open_member in members:
+            parts = split_member_name(name)
+            if parts is None:
+                continue
+
+            # Keep the source directory even when nothing inside it is needed
+            if parts[0] not in top_dirs and (len(parts) > 1 or not is_file):
+                top_dirs.add(parts[0])
+                os.makedirs(os.path.join(tmpdir, parts[0]), exist_ok=True)
+
+            if is_file and is_needed_member(parts):
+                with open_member() as source, open(
+                    os.path.join(tmpdir, *parts), "wb"
+                ) as target:
+                    shutil.copyfileobj(source, target, UNPACK_BUFFER_SIZE)
 
     return tmpdir
 
 
+ARCHIVE_EXTENSIONS = frozenset(["tar", "tar.gz", "tar.bz2", "tar.xz", "zip"])
+
+
+def match_extension(filename, extensions):
+    """ Returns the (possibly two part) extension of filename found in extensions """
+    parts = filename.rsplit(".", 2)
+    if len(parts) == 3 and "{}.{}".format(parts[1], parts[2]) in extensions:
+        return "{}.{}".format(parts[1], parts[2])
+    if len(parts) > 1 and parts[-1] in extensions:
+        return parts[-1]
+    return None
+
+
 def get_file_extension(uri):
-    extensions = ["tar", "tar.gz", "tar.bz2", "tar.xz", "zip"]
-    for extension in extensions:
-        if uri.endswith(extension):
-            return extension
-    raise Exception("Extension not supported: {}".format(uri))
+    extension = match_extension(uri, ARCHIVE_EXTENSIONS)
+    if extension is None:
+        raise Exception("Extension not supported: {}".format(uri))
+    return extension
+
+# The distribution name at the start of a PEP 508 requirement string
+REQUIREMENT_NAME_RE = re.compile(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
 
+
+@lru_cache(maxsize=None)
 def package_to_bb_build_depends(package_name):
-    name = package_name.split('<')[0].split('>')[0].split('~')[0].split('=')[0].strip()
+    match = REQUIREMENT_NAME_RE.match(package_name)
+    name = match.group(1) if match else package_name.strip()
     return "${PYTHON_PN}-" + package_to_bb_name(name) + "-native"
 
-def gather_package_build_depends(name, data):
-    build_deps = []
 
-    if re.match(b"^(\s*)$", name):
-        return build_deps
+def literal_strings(node, assignments, depth=0):
+    """ Flattens a list/tuple of string literals, following simple variables """
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, (ast.List, ast.Tuple)):
+        strings = []
+        for element in node.elts:
+            strings.extend(literal_strings(element, assignments, depth))
+        return strings
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return literal_strings(node.left, assignments, depth) + literal_strings(
+            node.right, assignments, depth
+        )
+    if isinstance(node, ast.Name) and node.id in assignments and depth < 8:
+        return literal_strings(assignments[node.id], assignments, depth + 1)
+    return []
 
-    # Check if it's a variable
-    match = re.search(name + b" = (.*)", data)
-    if match:
-        # This is a variable check his contents
-        for bd in match.group(1).replace(b'[', b'').replace(b']', b'').split(b","):
-            match = re.match('^\w\S+', bd.decode("utf-8").replace("'","").replace("\"", "").strip())
-            if match:
-                build_deps.append(package_to_bb_build_depends(match.group(0)))
-    else:
-        # This is a regular field
-        build_deps.append(package_to_bb_build_depends(name.decode("utf-8").replace("'","").replace("\"", "")))
 
+def setup_py_build_depends(path):
+    """ Reads setup_requires from the setup() call in setup.py """
+    with open(path, "rb") as f:
+        try:
+            tree = ast.parse(f.read())
+        except (SyntaxError, ValueError):
+            return []
+
+    assignments = {}
+    calls = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    assignments[target.id] = node.value
+        elif isinstance(node, ast.Call):
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+            if name == "setup":
+                calls.append(node)
+
+    requires = []
+    for call in calls:
+        for keyword in call.keywords:
+            if keyword.arg == "setup_requires":
+                requires.extend(literal_strings(keyword.value, assignments))
+    return requires
+
+
+def pyproject_toml_build_depends(path):
+    """ Reads build-system.requires and project.dependencies from pyproject.toml """
+    with open(path, "rb") as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError:
+            return []
 
-    return build_deps
+    requires = []
+    for table, key in (("build-system", "requires"), ("project", "dependencies")):
+        section = data.get(table)
+        if isinstance(section, dict):
+            values = section.get(key)
+            if isinstance(values, list):
+                requires.extend(values)
+    return [r for r in requires if isinstance(r, str)]
 
 
-def get_package_file_info(package, version, uri):
+def get_package_file_info(package, version, uri, read_requires_dist=False):
     extension = get_file_extension(uri)
     with tempfile.TemporaryDirectory() as tmp:
         build_deps = []
@@ -197,57 +463,57 @@ def get_package_file_info(package, version, uri):
         if os.path.exists(output):
             os.remove(output)
 
-        urllib.request.urlretrieve(uri, output)
+        src_hash = BufferedHash("md5", "sha256")
+        download(uri, output, src_hash)
 
         tmpdir = unpack_package(output)
-        src_dir = os.listdir(tmpdir)[0]
+        with os.scandir(tmpdir) as entries:
+            src_dir = next(entries).name
 
-        src_files = os.listdir("{}/{}".format(tmpdir, src_dir))
-
-        try:
-            license_file = next(
-                f
-                for f in src_files
-                if ("license" in f.lower() or "copying" in f.lower())
-                and not os.path.isdir(os.path.join(tmpdir, src_dir, f))
-            )
-        except:
-            license_file = None
+        license_file = None
+        with os.scandir(os.path.join(tmpdir, src_dir)) as entries:
+            for entry in entries:
+                name = entry.name.lower()
+                if ("license" in name or "copying" in name) and not entry.is_dir():
+                    license_file = entry.name
+                    break
 
         # Try to catch build depends into setup.py file
+        requires = []
         setup_py = os.path.join(tmpdir, src_dir, "setup.py")
         if os.path.exists(setup_py):
             if license_file is None:
                 license_file = "setup.py"
-            with open(setup_py, 'r+') as f:
-                data = mmap.mmap(f.fileno(), 0)
-                match = re.search(b'^(\s*)setup_requires( *)=( *)([\[|\(]*)(.*)([\]|\)]*)', data, re.MULTILINE)
-                if match:
-                    for bd in match.group(5).replace(b'[', b'').replace(b']', b'').replace(b'(', b'').replace(b')', b'').strip().split(b","):
-                         build_deps.extend(gather_package_build_depends(bd, data))
+            requires.extend(setup_py_build_depends(setup_py))
 
         pyproject_toml = os.path.join(tmpdir, src_dir, "pyproject.toml")
         if os.path.exists(pyproject_toml):
             if license_file is None:
                 license_file = "pyproject.toml"
-            with open(pyproject_toml, 'r+') as f:
-                data = mmap.mmap(f.fileno(), 0)
-                match = re.search(b'^(\s*)dependencies( *)=( *)([\[|\(]*)(.*)([\]|\)]*)', data, re.MULTILINE)
-                if match:
-                    for bd in match.group(5).replace(b'[', b'').replace(b']', b'').replace(b'(', b'').replace(b')', b'').strip().split(b","):
-                         build_deps.extend(gather_package_build_depends(bd, data))
-
+            requires.extend(pyproject_toml_build_depends(pyproject_toml))
 
+        for requirement in requires:
+            build_dep = package_to_bb_build_depends(requirement)
+            if build_dep not in build_deps:
+                build_deps.append(build_dep)
 
         license_path = os.path.join(tmpdir, src_dir, license_file)
         license_md5 = md5sum(license_path)
-        src_md5 = md5sum(output)
-        src_sha256 = sha256sum(output)
+
+        # Read requires_dist from the archive we already have instead of
+        # downloading it again in fetch_requirements_from_remote_package
+        requires_dist = None
+        if read_requires_dist:
+            try:
+                requires_dist = pkginfo.SDist(output).requires_dist
+            except Exception:
+                pass
 
         os.remove(output)
         shutil.rmtree(tmpdir)
 
-        return (src_md5, src_sha256, src_dir, license_file, license_md5, build_deps)
+        src_md5, src_sha256 = src_hash.hexdigests()
+        return (src_md5, src_sha256, src_dir, license_file, license_md5, build_deps, requires_dist)
 
 
 def decide_version(spec):
@@ -287,15 +553,25 @@ def parse_requires_dist(requires_dist):
 
 def pkg_size(pkg):
     # whl is omitted as we prefer source package
-    extensions = ["tar", "tar.gz", "tar.bz2", "tar.xz"]
-    for extension in extensions:
-        if pkg["url"].endswith(extension):
-            return pkg["size"]
-    if pkg["url"].endswith("zip"):
+    extension = match_extension(pkg["url"], ARCHIVE_EXTENSIONS)
+    if extension == "zip":
         return pkg["size"] * 10
+    if extension is not None:
+        return pkg["size"]
     return pkg["size"] * 10000
 
 
+PACKAGE_PARSERS = {
+    "tar": pkginfo.SDist,
+    "tar.gz": pkginfo.SDist,
+    "tar.bz2": pkginfo.SDist,
+    "tar.xz": pkginfo.SDist,
+    "zip": pkginfo.SDist,
+    "whl": pkginfo.Wheel,
+    "egg": pkginfo.BDist,
+}
+
+
 def fetch_requirements_from_remote_package(info, version):
     """ Looks up requires_dist from an actual package """
 
@@ -304,18 +580,12 @@ def fetch_requirements_from_remote_package(info, version):
         pkg_versions = info["releases"][version]
 
         # If we must fetch a package, lets fetch the smallest one
-        pkg_url = sorted(pkg_versions, key=pkg_size, reverse=False)[0]["url"]
+        pkg_url = min(pkg_versions, key=pkg_size)["url"]
         filename = pkg_url.split("/")[-1]
 
         # Select the appropriate parser from pkginfo based on the filename
-        parse = None
-        if filename.endswith(".tar.gz") or filename.endswith(".zip") or filename.endswith(".tar.xz") or filename.endswith(".tar.bz2") or filename.endswith(".tar"):
-            parse = pkginfo.SDist
-        elif filename.endswith(".whl"):
-            parse = pkginfo.Wheel
-        elif filename.endswith(".egg"):
-            parse =pkginfo.BDist
-        else:
+        parse = PACKAGE_PARSERS.get(match_extension(filename, PACKAGE_PARSERS))
+        if parse is None:
             raise RuntimeError("Unsupported fileformat for package introspection: {}".format(filename))
     else:
         pkg_url = info["info"]["url"]
@@ -325,10 +595,56 @@ def fetch_requirements_from_remote_package(info, version):
     # Download the package and read the MANIFEST
     with tempfile.TemporaryDirectory() as directory:
         path = os.path.join(directory, filename)
-        urllib.request.urlretrieve(pkg_url, path)
+        download(pkg_url, path)
         return parse(path).requires_dist
 
 
+PYPI_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "pipoe"
+)
+PYPI_CACHE_TTL = 24 * 60 * 60
+
+
+@lru_cache(maxsize=None)
+def fetch_pypi_json(package_name, version=None):
+    """ Fetches the PyPI JSON metadata, cached for the run and, if pinned, on disk """
+    # The unversioned response decides which release is newest, so it must
+    # never come from a day old disk cache
+    if not version:
+        url = "https://pypi.org/pypi/{}/json".format(package_name)
+        response = SESSION.get(url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        return json.loads(response.content.decode(encoding="UTF-8"))
+
+    url = "https://pypi.org/pypi/{}/{}/json".format(package_name, version)
+    cache_file = os.path.join(
+        PYPI_CACHE_DIR, "{}.json".format(hashlib.sha1(url.encode()).hexdigest())
+    )
+    try:
+        if time.time() - os.path.getmtime(cache_file) < PYPI_CACHE_TTL:
+            with open(cache_file, "rb") as f:
+                return json.loads(f.read().decode(encoding="UTF-8"))
+    except (OSError, ValueError):
+        pass
+
+    # requests asks for gzip and decodes it transparently
+    response = SESSION.get(url, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    data = response.content
+    info = json.loads(data.decode(encoding="UTF-8"))
+
+    # Write through a temporary file so concurrent runs never see half a file
+    try:
+        os.makedirs(PYPI_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=PYPI_CACHE_DIR, delete=False) as f:
+            f.write(data)
+        os.replace(f.name, cache_file)
+    except OSError:
+        pass
+
+    return info
+
+
 def get_package_dependencies(requires_dist, follow_extras=False):
     deps = []
 
@@ -343,10 +659,26 @@ def get_package_dependencies(requires_dist, follow_extras=False):
 
 
 PROCESSED_PACKAGES = []
+# PROCESSED_PACKAGES grouped by normalized package name
+PROCESSED_INDEX = {}
+
+# Dependency siblings are gathered concurrently; LOCK guards PROCESSED_PACKAGES,
+# PROCESSED_INDEX and the per-run package list.
+MAX_WORKERS = 16
+LOCK = threading.Lock()
+PROMPT_LOCK = threading.Lock()
+
+@lru_cache(maxsize=None)
+def parse_version(version: str):
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
 
 def compare_versions(version1: str, version2: str) -> int:
     """
-    Compares two pip package versions without using external modules.
+    Compares two pip package versions following PEP 440.
     Returns:
         -1 if version1 < version2
          0 if version1 == version2
@@ -356,6 +688,12 @@ def compare_versions(version1: str, version2: str) -> int:
     if not version1:
         return -1
 
+    parsed1 = parse_version(version1)
+    parsed2 = parse_version(version2)
+    if parsed1 is not None and parsed2 is not None:
+        return (parsed1 > parsed2) - (parsed1 < parsed2)
+
+    # Fall back to a dotted comparison for versions PEP 440 rejects
     def normalize(version: str):
         """Converts version string into a list of integers for comparison."""
         return [int(part) if part.isdigit() else part for part in version.replace("-", ".").split(".")]
@@ -375,11 +713,21 @@ def compare_versions(version1: str, version2: str) -> int:
 
 
 
-def check_package_already_processed(package_name, version,
-                                    processed_packages, packages):
-    all_packages = processed_packages + packages[0]
-    for package in all_packages:
-        if package_name == package.name:
+def add_to_index(index, package):
+    index.setdefault(package_to_bb_name(package.name), []).append(package)
+
+
+def add_processed_package(package):
+    PROCESSED_PACKAGES.append(package)
+    add_to_index(PROCESSED_INDEX, package)
+
+
+def check_package_already_processed(package_name, version, *indexes):
+    key = package_to_bb_name(package_name)
+    for index in indexes:
+        for package in index.get(key, ()):
+            if not package.version:
+                return True
             result = compare_versions(version, package.version)
             if result != 1:
                 return True
@@ -397,17 +745,75 @@ def get_package_info(
     extra=None,
     follow_extras=False,
     default_license=None,
+    jobs=MAX_WORKERS,
 ):
-    global PROCESSED_PACKAGES
+    """ Gathers package and all of its dependencies, fetching siblings concurrently """
+    if not packages:
+        packages = [[]]
+
+    executor = ThreadPoolExecutor(max_workers=jobs)
 
+    def submit(name, version, indent, extra):
+        return executor.submit(
+            gather_package_info,
+            name,
+            version,
+            packages,
+            indent,
+            extra,
+            follow_extras,
+            default_license,
+        )
+
+    # Dependencies that are being gathered but are not in packages yet
+    reserved = {}
+    futures = {submit(package, version, indent, extra): (None, indent)}
+    try:
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                reservation, parent_indent = futures.pop(future)
+                if reservation is not None:
+                    reserved[package_to_bb_name(reservation.name)].remove(reservation)
+
+                for dependency in future.result():
+                    with LOCK:
+                        if check_package_already_processed(
+                            dependency.name,
+                            dependency.version,
+                            PROCESSED_INDEX,
+                            reserved,
+                        ):
+                            continue
+                        add_to_index(reserved, dependency)
+
+                    child = submit(
+                        dependency.name,
+                        dependency.version,
+                        parent_indent + 2,
+                        dependency.extra,
+                    )
+                    futures[child] = (dependency, parent_indent + 2)
+    except KeyboardInterrupt:
+        # Drop the queued gathers and do not wait for the running ones
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        raise
+    executor.shutdown()
+
+    # Packages are appended as they complete, so put them in a stable order
+    packages[0].sort(key=lambda p: (package_to_bb_name(p.name), p.version))
+    return packages[0]
+
+
+def gather_package_info(
+    package, version, packages, indent, extra, follow_extras, default_license
+):
+    """ Gathers a single package and returns the dependencies still to visit """
     package_name = package.split('[')[0]
 #    extra_needed = package.split('[')[1].replace("]", "")
 
-    if not packages:
-        packages = [[]]
-    elif check_package_already_processed(package_name, version, PROCESSED_PACKAGES, packages):
-        return packages[0]
-
     indent_str = ""
     if indent:
         indent_str = "|" + (indent - 2) * "-" + " "
@@ -424,10 +830,8 @@ def get_package_info(
 
     try:
         if version:
-            if re.search('\*', version):
-                url = "https://pypi.org/pypi/{}/json".format(package_name)
-                response = urllib.request.urlopen(url).read().decode(encoding="UTF-8")
-                info = json.loads(response)
+            if "*" in version:
+                info = fetch_pypi_json(package_name)
                 pv = []
                 v = version.split('.')
                 print("fuzzy version {} ".format(v))
@@ -444,13 +848,7 @@ def get_package_info(
                         pv.append(i)
                 version = pv[-1]
 
-
-            url = "https://pypi.org/pypi/{}/{}/json".format(package_name, version)
-        else:
-            url = "https://pypi.org/pypi/{}/json".format(package_name)
-
-        response = urllib.request.urlopen(url).read().decode(encoding="UTF-8")
-        info = json.loads(response)
+        info = fetch_pypi_json(package_name, version)
 
         name = package_name
         if not version:
@@ -479,13 +877,14 @@ def get_package_info(
             raise Exception("No sdist package can be found.")
 
         src_uri = version_info["url"]
-        src_md5, src_sha256, src_dir, license_file, license_md5, build_deps = get_package_file_info(
-            package_name, version, src_uri
-        )
-
         requires_dist = info["info"]["requires_dist"]
+        src_md5, src_sha256, src_dir, license_file, license_md5, build_deps, sdist_requires_dist = get_package_file_info(
+            package_name, version, src_uri, read_requires_dist=requires_dist is None
+        )
 
         # Only parse if requires_dist is missing, e.g. sentry-sdk
+        if requires_dist is None:
+            requires_dist = sdist_requires_dist
         if requires_dist is None:
             requires_dist = fetch_requirements_from_remote_package(info, version)
 
@@ -509,26 +908,17 @@ def get_package_info(
             build_deps,
         )
 
-        packages[0].append(package)
-        PROCESSED_PACKAGES.append(package)
-
-        for dependency in dependencies:
-            get_package_info(
-                dependency.name,
-                version=dependency.version,
-                packages=packages,
-                indent=indent + 2,
-                extra=dependency.extra,
-                follow_extras=follow_extras,
-                default_license=default_license,
-            )
+        with LOCK:
+            packages[0].append(package)
+            add_processed_package(package)
 
     except Exception as e:
         print(
             "  {} [ERROR] Failed to gather {} ({})".format(indent_str, package, str(e))
         )
+        return []
 
-    return packages[0]
+    return dependencies
 
 
 def generate_recipe(package, outdir, python, is_extra=False, use_pypi=False):
@@ -540,21 +930,19 @@ def generate_recipe(package, outdir, python, is_extra=False, use_pypi=False):
     print("  {}".format(basename))
 
     if is_extra:
-        output = BB_EXTRA_TEMPLATE.format(
+        output = RENDER_BB_EXTRA(
             summary=package.summary,
             homepage=package.homepage,
             author=package.author,
             author_email=package.author_email,
             dependencies=" ".join(
-                [
-                    "{}-{}".format(python, package_to_bb_name(dep.name))
-                    for dep in package.dependencies
-                ]
+                f"{python}-{package_to_bb_name(dep.name)}"
+                for dep in package.dependencies
             ),
         )
     else:
-        selected_template = BB_TEMPLATE_PYPI if use_pypi else BB_TEMPLATE
-        output = selected_template.format(
+        render = RENDER_BB_PYPI if use_pypi else RENDER_BB
+        output = render(
             summary=package.summary,
             md5=package.src_md5,
             sha256=package.src_sha256,
@@ -568,26 +956,20 @@ def generate_recipe(package, outdir, python, is_extra=False, use_pypi=False):
             homepage=package.homepage,
             author=package.author,
             author_email=package.author_email,
-            build_dependencies=" ".join(
-                [
-                    dep
-                    for dep in package.build_dependencies
-                ]
-            ),
+            build_dependencies=" ".join(package.build_dependencies),
             dependencies=" ".join(
-                [
-                    "{}-{}".format(python, package_to_bb_name(dep.name))
-                    for dep in package.dependencies
-                ]
+                f"{python}-{package_to_bb_name(dep.name)}"
+                for dep in package.dependencies
             ),
             setuptools="3" if python == "python3" else "",
         )
 
-    with open(bbfile, "w") as outfile:
-        outfile.write(output)
+    write_file(bbfile, output)
 
 
-def parse_requirements(requirements_file, follow_extras=False, default_license=None):
+def parse_requirements(
+    requirements_file, follow_extras=False, default_license=None, jobs=MAX_WORKERS
+):
     packages = []
 
     with open(requirements_file, "r") as infile:
@@ -602,6 +984,7 @@ def parse_requirements(requirements_file, follow_extras=False, default_license=N
                             parts[1],
                             follow_extras=follow_extras,
                             default_license=default_license,
+                            jobs=jobs,
                         )
                     elif len(parts) == 1:
                         packages += get_package_info(
@@ -609,6 +992,7 @@ def parse_requirements(requirements_file, follow_extras=False, default_license=N
                             None,
                             follow_extras=follow_extras,
                             default_license=default_license,
+                            jobs=jobs,
                         )
                     else:
                         print("    Unparsed package: {}".format(package))
@@ -619,16 +1003,13 @@ def parse_requirements(requirements_file, follow_extras=False, default_license=N
 
 
 def write_preferred_versions(packages, outfile, python):
-    versions = []
-    for package in packages:
-        versions.append(
-            'PREFERRED_VERSION_{}-{} = "{}"'.format(
-                python, package_to_bb_name(package.name), package.version
-            )
-        )
+    versions = "\n".join(
+        f'PREFERRED_VERSION_{python}-{package_to_bb_name(package.name)} = "{package.version}"'
+        for package in packages
+    )
 
     with open(outfile, "w") as outfile:
-        outfile.write("\n".join(versions))
+        outfile.write(versions)
 
 
 def generate_recipes(packages, outdir, python, follow_extras=False, pypi=False):
@@ -643,17 +1024,15 @@ def generate_recipes(packages, outdir, python, follow_extras=False, pypi=False):
                     continue
 
                 processed.append(extra.extra)
-                extra_package = package
-                extra_package = extra_package._replace(
-                    name=package.name + "-{}".format(extra.extra)
-                )
-                extra_package = extra_package._replace(
+                extra_package = replace(
+                    package,
+                    name=package.name + "-{}".format(extra.extra),
                     dependencies=[Dependency(package.name, package.version, None)]
                     + [
                         Dependency(e.name, e.version, None)
                         for e in extras
                         if e.extra == extra.extra
-                    ]
+                    ],
                 )
                 generate_recipe(extra_package, outdir, python, is_extra=True, use_pypi=pypi)
 
@@ -694,7 +1073,7 @@ def parse_existing_packages(existing_packages):
                 version,
                 nope,nope,nope,nope,nope,nope,nope,nope,nope,nope,nope,nope,nope
             )
-            PROCESSED_PACKAGES.append(package)
+            add_processed_package(package)
 
 
 def main():
@@ -752,8 +1131,20 @@ def main():
             help="Write preferred versions to a file.",
             default=True
         )
+        parser.add_argument(
+            "--jobs",
+            "-j",
+            type=int,
+            help="The number of packages to gather concurrently.",
+            default=MAX_WORKERS,
+        )
         args = parser.parse_args()
 
+        if args.jobs < 1:
+            raise Exception("--jobs must be at least 1")
+        if args.jobs > 32:
+            mount_session(args.jobs)
+
         if args.yocto_layers_dir and args.existing_packages:
             generate_oe_pypi_recipes(args.yocto_layers_dir, args.existing_packages, args.python)
             print("Existing packages are available in: {}".format(args.existing_packages))
@@ -769,6 +1160,7 @@ def main():
                 args.requirements,
                 follow_extras=args.extras,
                 default_license=args.default_license,
+                jobs=args.jobs,
             )
         elif args.package:
             packages = get_package_info(
@@ -776,6 +1168,7 @@ def main():
                 args.version,
                 follow_extras=args.extras,
                 default_license=args.default_license,
+                jobs=args.jobs,
             )
         else:
             raise Exception("No packages provided!")
@@ -786,8 +1179,8 @@ def main():
         print()
         if args.licenses:
             license_file = os.path.join(args.outdir, "licenses.py")
-            with open(license_file, "w") as outfile:
-                outfile.write("LICENSES = " + pformat(licenses.LICENSES))
+            with open(license_file, "w", encoding="utf-8") as outfile:
+                outfile.write(licenses.source())
 
             print("License mappings are available in: {}".format(license_file))
 
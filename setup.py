@@ -29,7 +29,7 @@ setup(
     ],
     keywords="yocto bitbake openembedded",
     packages=["pipoe"],
-    python_requires="!=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, <4",
+    python_requires=">=3.8, <4",
     install_requires=install_requires,
     entry_points={"console_scripts": ["pipoe = pipoe.pipoe:main"]},
 )